@@ -18,6 +18,13 @@ export interface PackData {
   masks: Record<string, Uint8Array>
 }
 
+interface PackPartInfo {
+  dtype?: string
+  scale?: number
+  offset?: number
+  nodata?: number
+}
+
 export interface EnvironmentSamplerOptions {
   defaultWaveHeight?: number
   defaultDepth?: number
@@ -52,6 +59,22 @@ async function loadFloat32Array(url: string, expectedLength: number): Promise<Fl
   return array
 }
 
+// Decode an int16 field as stored * scale + offset, with nodata cells as NaN
+async function loadQuantizedArray(url: string, expectedLength: number, part: PackPartInfo): Promise<Float32Array> {
+  const buffer = await fetchArrayBuffer(url)
+  const raw = new Int16Array(buffer)
+  if (expectedLength > 0 && raw.length !== expectedLength) {
+    console.warn(`Int16 array length mismatch for ${url}: expected ${expectedLength}, got ${raw.length}`)
+  }
+  const scale = part.scale ?? 1
+  const offset = part.offset ?? 0
+  const array = new Float32Array(raw.length)
+  for (let i = 0; i < raw.length; i++) {
+    array[i] = raw[i] === part.nodata ? NaN : raw[i] * scale + offset
+  }
+  return array
+}
+
 async function loadUint8Array(url: string, expectedLength: number): Promise<Uint8Array> {
   const buffer = await fetchArrayBuffer(url)
   const array = new Uint8Array(buffer)
@@ -61,6 +84,19 @@ async function loadUint8Array(url: string, expectedLength: number): Promise<Uint
   return array
 }
 
+// Expand a bitfield mask into one 0/1 array per named bit
+function splitMaskBits(combined: Uint8Array, bitLayout: Record<string, number>): Record<string, Uint8Array> {
+  const result: Record<string, Uint8Array> = {}
+  for (const [maskKey, bit] of Object.entries(bitLayout)) {
+    const mask = new Uint8Array(combined.length)
+    for (let i = 0; i < combined.length; i++) {
+      mask[i] = (combined[i] >> bit) & 1
+    }
+    result[`mask_${maskKey}`] = mask
+  }
+  return result
+}
+
 export async function loadPack(basePath: string): Promise<PackData> {
   const manifestUrl = `${basePath}/manifest.json`
   const manifest = await fetch(manifestUrl).then(res => {
@@ -88,10 +124,14 @@ export async function loadPack(basePath: string): Promise<PackData> {
   const totalScalars = rows * cols
   const timeScalars = timeCount * totalScalars
 
-  const loadField = async (fieldName: string) => {
+  const parts: PackPartInfo[] = Array.isArray(manifest.parts) ? manifest.parts : []
+
+  const loadField = async (fieldName: string, part: PackPartInfo = {}) => {
     const filename = `${basePath}/${fieldName}.bin`
     try {
-      const array = await loadFloat32Array(filename, timeScalars)
+      const array = part.dtype === 'int16'
+        ? await loadQuantizedArray(filename, timeScalars, part)
+        : await loadFloat32Array(filename, timeScalars)
       fieldData[fieldName] = array
     } catch (err) {
       console.warn(`Unable to load field ${fieldName} from ${filename}:`, err)
@@ -99,7 +139,9 @@ export async function loadPack(basePath: string): Promise<PackData> {
   }
 
   if (Array.isArray(manifest.fields)) {
-    for (const fieldName of manifest.fields as string[]) {
+    const fieldNames = manifest.fields as string[]
+    for (let idx = 0; idx < fieldNames.length; idx++) {
+      const fieldName = fieldNames[idx]
       if (fieldName.startsWith('mask_')) {
         const filename = `${basePath}/${fieldName}.bin`
         try {
@@ -108,14 +150,27 @@ export async function loadPack(basePath: string): Promise<PackData> {
           console.warn(`Unable to load mask ${fieldName} from ${filename}:`, err)
         }
       } else {
-        await loadField(fieldName)
+        await loadField(fieldName, parts[idx])
       }
     }
   }
 
   // Also load explicit mask files if present in manifest.masks
   if (manifest.masks && typeof manifest.masks === 'object') {
-    for (const [maskKey, maskFile] of Object.entries<string>(manifest.masks)) {
+    const { combined, bit_layout: bitLayout, ...maskFiles } = manifest.masks
+
+    // Bitfield packs store every mask in one file; split it back into per-mask arrays
+    if (typeof combined === 'string' && bitLayout && typeof bitLayout === 'object') {
+      const filename = `${basePath}/${combined.replace('.bin.zst', '.bin')}`
+      try {
+        const combinedMask = masks.mask_combined ?? await loadUint8Array(filename, totalScalars)
+        Object.assign(masks, splitMaskBits(combinedMask, bitLayout))
+      } catch (err) {
+        console.warn(`Unable to load combined mask from ${filename}:`, err)
+      }
+    }
+
+    for (const [maskKey, maskFile] of Object.entries<string>(maskFiles)) {
       const logicalName = `mask_${maskKey}`
       const filename = `${basePath}/${maskFile.replace('.bin.zst', '.bin')}`
       try {
@@ -272,8 +272,10 @@ class RouterService {
     const dLon = view.getFloat64(40, true);
     const rows = view.getUint32(48, true);
     const cols = view.getUint32(52, true);
+    // Payloads shorter than one byte per cell carry a flag byte plus 8 cells per byte
+    const bitPacked = buffer.byteLength - 56 < rows * cols;
     console.log(
-      `[Land mask] lat:[${lat0}, ${lat1}] lon:[${lon0}, ${lon1}] resolution=${dLat}°x${dLon}° grid=${rows}x${cols}`
+      `[Land mask] lat:[${lat0}, ${lat1}] lon:[${lon0}, ${lon1}] resolution=${dLat}°x${dLon}° grid=${rows}x${cols}${bitPacked ? ' (bit-packed)' : ''}`
     );
   }
 
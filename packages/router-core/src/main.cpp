@@ -977,10 +977,20 @@ public:
         parsed.rows = read_uint32(offset); offset += sizeof(std::uint32_t);
         parsed.cols = read_uint32(offset); offset += sizeof(std::uint32_t);
         const std::size_t expected_cells = static_cast<std::size_t>(parsed.rows) * static_cast<std::size_t>(parsed.cols);
-        if (bytes.size() - offset < expected_cells) {
+        const std::size_t payload_bytes = bytes.size() - offset;
+        const std::size_t packed_bytes = (expected_cells + 7) / 8;
+        if (payload_bytes >= expected_cells) {
+            parsed.cells.assign(bytes.begin() + static_cast<long>(offset), bytes.begin() + static_cast<long>(offset + expected_cells));
+        } else if (payload_bytes >= 1 + packed_bytes && bytes[offset] == 1) {
+            // Bit-packed payload: flag byte, then cell i in bit (i % 8) of byte i / 8
+            offset += 1;
+            parsed.cells.resize(expected_cells);
+            for (std::size_t i = 0; i < expected_cells; ++i) {
+                parsed.cells[i] = static_cast<std::uint8_t>((bytes[offset + (i >> 3)] >> (i & 7)) & 1u);
+            }
+        } else {
             throw std::runtime_error("Land mask buffer missing cell data");
         }
-        parsed.cells.assign(bytes.begin() + static_cast<long>(offset), bytes.begin() + static_cast<long>(offset + expected_cells));
         parsed.loaded = true;
         land_mask = std::move(parsed);
         if (router) {
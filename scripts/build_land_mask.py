@@ -1,11 +1,22 @@
 import argparse
+import mmap
+import os
 import struct
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
+
 DEFAULT_DATA_DIR = Path('data/geopolygondata')
 DEFAULT_SHAPEFILE = DEFAULT_DATA_DIR / 'GSHHS_i_L1.shp'
 DEFAULT_OUTPUT = Path('apps/web/public/land_mask.bin')
 
+# Shapefile layouts, compiled once instead of per record
+FILE_CODE = struct.Struct('>i')
+REC_HDR = struct.Struct('>ii')
+SHAPE_TYPE = struct.Struct('<i')
+BBOX_HDR = struct.Struct('<4d2i')
+
 def parse_args():
     parser = argparse.ArgumentParser(description='Rasterize land polygons into a binary land mask.')
     parser.add_argument('--shapefile', type=Path, default=DEFAULT_SHAPEFILE, help='Input GSHHS shapefile path')
@@ -16,15 +27,20 @@ def parse_args():
     parser.add_argument('--lon1', type=float, default=180.0, help='Maximum longitude bound')
     parser.add_argument('--dlat', type=float, default=0.5, help='Latitude resolution in degrees')
     parser.add_argument('--dlon', type=float, default=0.5, help='Longitude resolution in degrees')
+    parser.add_argument('--bitpack', action='store_true', help='Pack 8 cells per byte behind a flag byte after the header')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes used for rasterization')
     return parser.parse_args()
 
 # Basic shapefile polygon parser (2D, no Z/M)
 class Ring:
-    __slots__ = ('points', 'area')
+    __slots__ = ('points', 'area', 'bbox')
 
     def __init__(self, points):
-        self.points = points
-        self.area = signed_area(points)
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.area = signed_area(self.points)
+        minx, miny = self.points.min(axis=0)
+        maxx, maxy = self.points.max(axis=0)
+        self.bbox = (float(minx), float(miny), float(maxx), float(maxy))
 
     @property
     def is_clockwise(self):
@@ -36,37 +52,28 @@ class Polygon:
     def __init__(self, outer, holes):
         self.outer = outer
         self.holes = holes
-        xs = [p[0] for p in outer.points]
-        ys = [p[1] for p in outer.points]
-        self.bbox = (min(xs), min(ys), max(xs), max(ys))
+        self.bbox = outer.bbox
 
 
 def signed_area(points):
-    area = 0.0
-    for (x1, y1), (x2, y2) in zip(points, points[1:]):
-        area += x1 * y2 - x2 * y1
-    x1, y1 = points[-1]
-    x2, y2 = points[0]
-    area += x1 * y2 - x2 * y1
-    return 0.5 * area
+    x = points[:, 0]
+    y = points[:, 1]
+    # Shoelace sum as two dot products plus the closing edge, without np.roll copies
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]) + x[-1] * y[0] - x[0] * y[-1])
 
 
 def point_in_ring(point, ring):
     x, y = point
-    inside = False
     pts = ring.points
-    for (x1, y1), (x2, y2) in zip(pts, pts[1:]):
-        if ((y1 > y) != (y2 > y)):
-            xinters = (x2 - x1) * (y - y1) / (y2 - y1 + 1e-15) + x1
-            if xinters > x:
-                inside = not inside
-    x1, y1 = pts[-1]
-    x2, y2 = pts[0]
-    if ((y1 > y) != (y2 > y)):
-        xinters = (x2 - x1) * (y - y1) / (y2 - y1 + 1e-15) + x1
-        if xinters > x:
-            inside = not inside
-    return inside
+    x1 = pts[:, 0]
+    y1 = pts[:, 1]
+    x2 = np.roll(x1, -1)
+    y2 = np.roll(y1, -1)
+    # Only edges straddling the ray are divided, so y2 != y1 and no epsilon is needed
+    crosses = (y1 > y) != (y2 > y)
+    x1, y1, x2, y2 = x1[crosses], y1[crosses], x2[crosses], y2[crosses]
+    xinters = (x2 - x1) * (y - y1) / (y2 - y1) + x1
+    return bool(np.count_nonzero(xinters > x) & 1)
 
 
 def point_in_polygon(point, poly: Polygon):
@@ -79,6 +86,9 @@ def point_in_polygon(point, poly: Polygon):
     if not point_in_ring(point, poly.outer):
         return False
     for hole in poly.holes:
+        hx0, hy0, hx1, hy1 = hole.bbox
+        if not (hx0 <= x <= hx1 and hy0 <= y <= hy1):
+            continue
         if point_in_ring(point, hole):
             return False
     return True
@@ -86,89 +96,130 @@ def point_in_polygon(point, poly: Polygon):
 
 def read_polygons(path: Path):
     polys = []
-    with path.open('rb') as f:
-        header = f.read(100)
-        if len(header) != 100:
-            raise RuntimeError('Invalid shapefile header')
-        file_code = struct.unpack('>i', header[:4])[0]
-        if file_code != 9994:
-            raise RuntimeError('Unexpected file code')
-        f.seek(100)
-        while True:
-            record_header = f.read(8)
-            if not record_header:
-                break
-            if len(record_header) != 8:
-                raise RuntimeError('Corrupt record header')
-            rec_num, content_len = struct.unpack('>ii', record_header)
-            content_bytes = content_len * 2
-            content = f.read(content_bytes)
-            if len(content) != content_bytes:
-                raise RuntimeError('Unexpected EOF in record')
-            shape_type = struct.unpack('<i', content[:4])[0]
-            if shape_type == 0:
+    # Slurp the whole file and parse records as zero-copy slices of one buffer
+    data = memoryview(path.read_bytes())
+    if len(data) < 100:
+        raise RuntimeError('Invalid shapefile header')
+    file_code = FILE_CODE.unpack_from(data, 0)[0]
+    if file_code != 9994:
+        raise RuntimeError('Unexpected file code')
+    off = 100
+    while off < len(data):
+        if len(data) - off < 8:
+            raise RuntimeError('Corrupt record header')
+        rec_num, content_len = REC_HDR.unpack_from(data, off)
+        off += 8
+        content_bytes = content_len * 2
+        content = data[off:off + content_bytes]
+        off += content_bytes
+        if len(content) != content_bytes:
+            raise RuntimeError('Unexpected EOF in record')
+        shape_type = SHAPE_TYPE.unpack_from(content)[0]
+        if shape_type == 0:
+            continue
+        if shape_type != 5:
+            raise RuntimeError(f'Unsupported shape type {shape_type}')
+        xmin, ymin, xmax, ymax, num_parts, num_points = BBOX_HDR.unpack_from(content, 4)
+        offset = 4 + BBOX_HDR.size
+        parts = np.frombuffer(content, dtype='<i4', count=num_parts, offset=offset)
+        offset += 4 * num_parts
+        points = np.frombuffer(content, dtype='<f8', count=num_points * 2, offset=offset).reshape(-1, 2)
+        rings = []
+        for idx, start in enumerate(parts):
+            end = parts[idx + 1] if idx + 1 < len(parts) else len(points)
+            ring_points = points[start:end]
+            if len(ring_points) < 4:
                 continue
-            if shape_type != 5:
-                raise RuntimeError(f'Unsupported shape type {shape_type}')
-            xmin, ymin, xmax, ymax, num_parts, num_points = struct.unpack('<4d2i', content[4:4 + 32 + 8])
-            offset = 4 + 32 + 8
-            parts = struct.unpack('<' + 'i'*num_parts, content[offset:offset + 4*num_parts])
-            offset += 4 * num_parts
-            coords = struct.unpack('<' + 'd'*(num_points*2), content[offset:offset + 16*num_points])
-            points = [(coords[i], coords[i+1]) for i in range(0, len(coords), 2)]
-            rings = []
-            for idx, start in enumerate(parts):
-                end = parts[idx + 1] if idx + 1 < len(parts) else len(points)
-                ring_points = points[start:end]
-                if len(ring_points) < 4:
+            rings.append(Ring(ring_points))
+        current_outer = None
+        holes = []
+        for ring in rings:
+            if ring.is_clockwise:
+                if current_outer is not None:
+                    polys.append(Polygon(current_outer, holes))
+                    holes = []
+                current_outer = ring
+            else:
+                if current_outer is None:
                     continue
-                rings.append(Ring(ring_points))
-            current_outer = None
-            holes = []
-            for ring in rings:
-                if ring.is_clockwise:
-                    if current_outer is not None:
-                        polys.append(Polygon(current_outer, holes))
-                        holes = []
-                    current_outer = ring
-                else:
-                    if current_outer is None:
-                        continue
-                    holes.append(ring)
-            if current_outer is not None:
-                polys.append(Polygon(current_outer, holes))
+                holes.append(ring)
+        if current_outer is not None:
+            polys.append(Polygon(current_outer, holes))
     return polys
 
 
-def build_mask(polygons, lat0, lat1, lon0, lon1, dlat, dlon):
+def collect_edges(polygons):
+    """Gather every ring edge, closing each ring, as (x1, y1, x2, y2, poly_id) arrays."""
+    rings = [(p, ring.points) for p, poly in enumerate(polygons) for ring in (poly.outer, *poly.holes)]
+    if not rings:
+        empty = np.empty(0)
+        return empty, empty, empty, empty, np.empty(0, dtype=np.int64)
+    start = np.concatenate([pts for _, pts in rings])
+    end = np.concatenate([np.roll(pts, -1, axis=0) for _, pts in rings])
+    poly_ids = np.concatenate([np.full(len(pts), p, dtype=np.int64) for p, pts in rings])
+    return start[:, 0], start[:, 1], end[:, 0], end[:, 1], poly_ids
+
+
+def rasterize_rows(lats, lons, x1, y1, x2, y2, poly_ids):
+    """Scanline-fill the grid rows at ``lats`` from closed-ring edges into a uint8 mask."""
+    rows = lats.size
+    cols = lons.size
+    # An edge crosses row r when min(y1, y2) <= lats[r] < max(y1, y2)
+    r_lo = np.searchsorted(lats, np.minimum(y1, y2), side='left')
+    r_hi = np.searchsorted(lats, np.maximum(y1, y2), side='left')
+    counts = r_hi - r_lo
+    edge = np.repeat(np.arange(counts.size), counts)
+    row = np.arange(edge.size) - np.repeat(np.cumsum(counts) - counts, counts) + r_lo[edge]
+    lat = lats[row]
+    x1, y1, x2, y2 = x1[edge], y1[edge], x2[edge], y2[edge]
+    xint = (x2 - x1) * (lat - y1) / (y2 - y1) + x1
+
+    # Closed rings cross a row an even number of times, so once crossings are ordered by
+    # (row, polygon, x) consecutive pairs bound the inside spans, holes included
+    order = np.lexsort((xint, poly_ids[edge], row))
+    xint = xint[order]
+    span_rows = row[order][0::2]
+    c_lo = np.searchsorted(lons, xint[0::2], side='left')
+    c_hi = np.searchsorted(lons, xint[1::2], side='left')
+
+    # Mark span starts/ends in a difference array and prefix-sum each row to fill them
+    width = cols + 1
+    coverage = (np.bincount(span_rows * width + c_lo, minlength=rows * width)
+                - np.bincount(span_rows * width + c_hi, minlength=rows * width))
+    return (coverage.reshape(rows, width).cumsum(axis=1)[:, :cols] > 0).astype(np.uint8)
+
+
+def build_mask(polygons, lat0, lat1, lon0, lon1, dlat, dlon, workers=1):
     rows = int(round((lat1 - lat0) / dlat)) + 1
     cols = int(round((lon1 - lon0) / dlon)) + 1
-    mask = [0] * (rows * cols)
-
-    import math
-
-    def lat_to_row(lat):
-        return int(math.floor((lat - lat0) / dlat))
-
-    def lon_to_col(lon):
-        return int(math.floor((lon - lon0) / dlon))
-
-    for poly in polygons:
-        minx, miny, maxx, maxy = poly.bbox
-        r_start = max(0, lat_to_row(miny) - 1)
-        r_end = min(rows - 1, lat_to_row(maxy) + 1)
-        c_start = max(0, lon_to_col(minx) - 1)
-        c_end = min(cols - 1, lon_to_col(maxx) + 1)
-        for r in range(r_start, r_end + 1):
-            lat = lat0 + r * dlat
-            for c in range(c_start, c_end + 1):
-                idx = r * cols + c
-                if mask[idx]:
-                    continue
-                lon = lon0 + c * dlon
-                if point_in_polygon((lon, lat), poly):
-                    mask[idx] = 1
-    return rows, cols, mask
+    lats = lat0 + np.arange(rows) * dlat
+    lons = lon0 + np.arange(cols) * dlon
+    # Polygons whose bbox misses the grid window cannot produce a span; drop them before
+    # their edges are expanded
+    polygons = [
+        poly for poly in polygons
+        if poly.bbox[3] >= lats[0] and poly.bbox[1] <= lats[-1]
+        and poly.bbox[2] >= lons[0] and poly.bbox[0] <= lons[-1]
+    ]
+    x1, y1, x2, y2, poly_ids = collect_edges(polygons)
+
+    workers = max(1, min(workers, rows))
+    if workers == 1:
+        return rows, cols, rasterize_rows(lats, lons, x1, y1, x2, y2, poly_ids)
+
+    # Rows are independent, so split them into bands and give each worker only the
+    # edges that cross its band; the band masks stack back into the full grid
+    y_lo = np.minimum(y1, y2)
+    y_hi = np.maximum(y1, y2)
+    bounds = np.linspace(0, rows, workers + 1).astype(int)
+    jobs = []
+    for r0, r1 in zip(bounds[:-1], bounds[1:]):
+        band = lats[r0:r1]
+        sel = (y_hi > band[0]) & (y_lo <= band[-1])
+        jobs.append((band, lons, x1[sel], y1[sel], x2[sel], y2[sel], poly_ids[sel]))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        bands = list(ex.map(rasterize_rows, *zip(*jobs)))
+    return rows, cols, np.concatenate(bands, axis=0)
 
 
 def main():
@@ -179,13 +230,26 @@ def main():
         raise SystemExit(f'Missing shapefile: {shapefile}')
 
     polys = read_polygons(shapefile)
-    rows, cols, mask = build_mask(polys, args.lat0, args.lat1, args.lon0, args.lon1, args.dlat, args.dlon)
+    rows, cols, mask = build_mask(polys, args.lat0, args.lat1, args.lon0, args.lon1, args.dlat, args.dlon,
+                                  workers=args.workers)
     output.parent.mkdir(parents=True, exist_ok=True)
-    with output.open('wb') as f:
-        f.write(struct.pack('<6d', args.lat0, args.lat1, args.lon0, args.lon1, args.dlat, args.dlon))
-        f.write(struct.pack('<II', rows, cols))
-        f.write(bytes(mask))
-    print(f'Wrote mask with {rows}x{cols} cells to {output}')
+    header = (struct.pack('<6d', args.lat0, args.lat1, args.lon0, args.lon1, args.dlat, args.dlon)
+              + struct.pack('<II', rows, cols))
+    payload = np.ascontiguousarray(mask)
+    if args.bitpack:
+        # Flag byte 1, then cell i stored in bit (i % 8) of byte i // 8
+        header += struct.pack('<B', 1)
+        payload = np.packbits(payload, axis=None, bitorder='little')
+    # Size the file up front and copy header and payload straight into its mapped pages
+    total = len(header) + payload.nbytes
+    with output.open('w+b') as f:
+        f.truncate(total)
+        with mmap.mmap(f.fileno(), total, access=mmap.ACCESS_WRITE) as mm:
+            mm[:len(header)] = header
+            mm[len(header):] = memoryview(payload).cast('B')
+            mm.flush()
+    layout = 'bit-packed ' if args.bitpack else ''
+    print(f'Wrote {layout}mask with {rows}x{cols} cells to {output}')
 
 
 if __name__ == '__main__':
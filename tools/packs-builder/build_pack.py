@@ -4,57 +4,130 @@ import xarray as xr
 import numpy as np
 import cfgrib # Required for GRIB files
 import netCDF4 # Required for NetCDF files (e.g., HYCOM)
-from scipy.ndimage import binary_dilation
-from shapely.geometry import Point
+from scipy.signal import fftconvolve
+import shapely
+from shapely.geometry import Point, box
 import geopandas as gpd
 from rasterio.features import rasterize
 from rasterio.transform import from_bounds
 import zstandard as zstd
 import json
+import orjson
 import os
 import hashlib
 import base64
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from nacl.signing import SigningKey
 from nacl.encoding import Base64Encoder
 
+try:
+    import blake3  # Optional: faster part hashes, SHA256 is used without it
+except ImportError:
+    blake3 = None
+
+# Open inputs lazily as dask arrays, one time step per chunk. The horizontal dims
+# stay whole so interpolation never spans a chunk boundary.
+GRID_CHUNKS = {'time': 1, 'latitude': -1, 'longitude': -1}
+HYCOM_CHUNKS = {'time': 1, 'lat': -1, 'lon': -1}
+GRIB_SUFFIXES = ('.grib', '.grib2', '.grb', '.grb2', '.gb2')
+
+# Linear interpolation weights per (source axis, target axis), shared by every
+# field and every input that sits on the same source grid
+_INTERP_WEIGHTS_CACHE = {}
+
+def make_linear_weights(src, tgt):
+    """
+    Weights for 1-D linear interpolation from the src axis onto tgt, as index
+    arrays lo, hi and a fraction w so that value = (1 - w) * v[lo] + w * v[hi].
+    Targets outside src are extrapolated from the end intervals, matching
+    interp1d(fill_value="extrapolate"). src may be in any order.
+    """
+    src = np.asarray(src, dtype=np.float64)
+    tgt = np.asarray(tgt, dtype=np.float64)
+    key = (src.tobytes(), tgt.tobytes())
+    if key not in _INTERP_WEIGHTS_CACHE:
+        order = np.argsort(src, kind='stable')
+        xs = src[order]
+        hi = np.clip(np.searchsorted(xs, tgt), 1, len(xs) - 1)
+        lo = hi - 1
+        w = (tgt - xs[lo]) / (xs[hi] - xs[lo])
+        _INTERP_WEIGHTS_CACHE[key] = (order[lo], order[hi], w)
+    return _INTERP_WEIGHTS_CACHE[key]
+
+def make_bilinear_weights(src_lats, src_lons, tgt_lats, tgt_lons):
+    """
+    Separable bilinear weights from a source lat/lon grid onto the target grid.
+    """
+    return make_linear_weights(src_lats, tgt_lats), make_linear_weights(src_lons, tgt_lons)
+
+def apply_bilinear_weights(values, weights):
+    """
+    Interpolate the last two (lat, lon) axes of values with precomputed weights.
+    """
+    (lat_lo, lat_hi, lat_w), (lon_lo, lon_hi, lon_w) = weights
+    dtype = np.result_type(values.dtype, np.float32)
+    lat_w = lat_w.astype(dtype, copy=False)[:, None]
+    lon_w = lon_w.astype(dtype, copy=False)
+    rows = values[..., lat_lo, :] * (1 - lat_w) + values[..., lat_hi, :] * lat_w
+    return rows[..., lon_lo] * (1 - lon_w) + rows[..., lon_hi] * lon_w
+
+def regrid_bilinear(ds, lat_dim, lon_dim, grid_info):
+    """
+    Bilinearly regrid every variable of ds onto the target grid, extrapolating
+    at the edges. The output uses latitude/longitude dims for every source.
+    """
+    target_lats = grid_info['lats']
+    target_lons = grid_info['lons']
+    weights = make_bilinear_weights(ds[lat_dim].values, ds[lon_dim].values, target_lats, target_lons)
+    
+    def regrid_variable(da):
+        return xr.apply_ufunc(
+            apply_bilinear_weights, da,
+            kwargs={'weights': weights},
+            input_core_dims=[[lat_dim, lon_dim]],
+            output_core_dims=[['latitude', 'longitude']],
+            exclude_dims={lat_dim, lon_dim},
+            dask='parallelized',
+            output_dtypes=[np.result_type(da.dtype, np.float32)],
+            dask_gufunc_kwargs={'output_sizes': {'latitude': len(target_lats), 'longitude': len(target_lons)}},
+            keep_attrs=True
+        )
+    
+    regridded = ds.map(regrid_variable, keep_attrs=True)
+    return regridded.assign_coords(latitude=target_lats, longitude=target_lons)
+
 def ingest_gfs(gfs_file_path, grid_info):
     """
     Ingests GFS (wind) data, regrids it, and returns a xarray dataset.
     """
     print(f"Ingesting GFS data from {gfs_file_path}")
     try:
-        # Try GRIB first, then fall back to NetCDF
-        try:
-            ds = xr.open_dataset(gfs_file_path, engine="cfgrib", backend_kwargs={'indexpath': ''})
-        except:
-            # Fall back to NetCDF for test data
-            ds = xr.open_dataset(gfs_file_path)
+        # GRIB files go through cfgrib; anything else (e.g. NetCDF test data) uses
+        # xarray's engine autodetection
+        if str(gfs_file_path).lower().endswith(GRIB_SUFFIXES):
+            ds = xr.open_dataset(gfs_file_path, engine="cfgrib", backend_kwargs={'indexpath': ''},
+                                 chunks=GRID_CHUNKS)
+        else:
+            ds = xr.open_dataset(gfs_file_path, chunks=GRID_CHUNKS)
 
         # Extract relevant wind components (assuming 'u' and 'v' variables for wind)
         # GFS data often has 'u' and 'v' components for wind, check variable names
         u_wind = ds['u'] # u-component of wind
         v_wind = ds['v'] # v-component of wind
 
-        # Create target coordinates for regridding
-        target_lats = grid_info['lats']
-        target_lons = grid_info['lons']
-
-        # Regrid the data to the target grid using linear interpolation
-        # It's important to align time and depth dimensions if they exist
-        regridded_ds = ds.interp(
-            latitude=target_lats,
-            longitude=target_lons,
-            method="linear",
-            kwargs={"fill_value": "extrapolate"}
-        ).sel(
-            time=ds.time.values[0], # Select first time step for simplicity for now
-            #surface=ds.surface.values[0] # Select first surface if multiple are present
-            drop=True
-        )
+        # Select the first time step for simplicity for now, before regridding so
+        # only that step is interpolated
+        ds = ds.isel(time=0, drop=True)
+        #ds = ds.isel(surface=0, drop=True) # Select first surface if multiple are present
 
         # Select only the relevant variables and rename if necessary for consistency
-        regridded_ds = regridded_ds[['u', 'v']].rename({'u': 'wind_u', 'v': 'wind_v'})
+        ds = ds[['u', 'v']].rename({'u': 'wind_u', 'v': 'wind_v'})
+        # Interpolate in float32; decoded inputs are often upcast to float64
+        ds = ds.astype(np.float32)
+
+        # Regrid the data to the target grid using cached bilinear weights
+        regridded_ds = regrid_bilinear(ds, 'latitude', 'longitude', grid_info)
 
         return regridded_ds
     except Exception as e:
@@ -68,7 +141,7 @@ def ingest_ww3(ww3_file_path, grid_info):
     print(f"Ingesting WW3 data from {ww3_file_path}")
     try:
         # Open the NetCDF file using xarray
-        ds = xr.open_dataset(ww3_file_path)
+        ds = xr.open_dataset(ww3_file_path, chunks=GRID_CHUNKS)
 
         # Extract relevant wave components (assuming 'hs', 'tp', 'dir' for wave data)
         # Check variable names from actual WW3 files for accuracy
@@ -76,23 +149,17 @@ def ingest_ww3(ww3_file_path, grid_info):
         tp = ds['tp'] # Peak wave period
         dir = ds['dir'] # Wave direction
 
-        # Create target coordinates for regridding
-        target_lats = grid_info['lats']
-        target_lons = grid_info['lons']
-
-        # Regrid the data to the target grid using linear interpolation
-        regridded_ds = ds.interp(
-            latitude=target_lats,
-            longitude=target_lons,
-            method="linear",
-            kwargs={"fill_value": "extrapolate"}
-        ).sel(
-            time=ds.time.values[0], # Select first time step for simplicity for now
-            drop=True
-        )
+        # Select the first time step for simplicity for now, before regridding so
+        # only that step is interpolated
+        ds = ds.isel(time=0, drop=True)
 
         # Select only the relevant variables and rename if necessary for consistency
-        regridded_ds = regridded_ds[['hs', 'tp', 'dir']].rename({'hs': 'wave_hs', 'tp': 'wave_tp', 'dir': 'wave_dir'})
+        ds = ds[['hs', 'tp', 'dir']].rename({'hs': 'wave_hs', 'tp': 'wave_tp', 'dir': 'wave_dir'})
+        # Interpolate in float32; decoded inputs are often upcast to float64
+        ds = ds.astype(np.float32)
+
+        # Regrid the data to the target grid using cached bilinear weights
+        regridded_ds = regrid_bilinear(ds, 'latitude', 'longitude', grid_info)
 
         return regridded_ds
     except Exception as e:
@@ -106,37 +173,85 @@ def ingest_hycom(hycom_file_path, grid_info):
     print(f"Ingesting HYCOM data from {hycom_file_path}")
     try:
         # Open the NetCDF file using xarray
-        ds = xr.open_dataset(hycom_file_path)
+        ds = xr.open_dataset(hycom_file_path, chunks=HYCOM_CHUNKS)
 
         # Extract relevant current components (assuming 'water_u' and 'water_v' for currents)
         # Check variable names from actual HYCOM files for accuracy
         u_current = ds['water_u'] # u-component of current
         v_current = ds['water_v'] # v-component of current
 
-        # Create target coordinates for regridding
-        target_lats = grid_info['lats']
-        target_lons = grid_info['lons']
-
-        # Regrid the data to the target grid using linear interpolation
-        regridded_ds = ds.interp(
-            lat=target_lats, 
-            lon=target_lons, 
-            method="linear",
-            kwargs={"fill_value": "extrapolate"}
-        ).sel(
-            time=ds.time.values[0], # Select first time step for simplicity for now
-            #depth=ds.depth.values[0], # Select first depth level if multiple are present
-            drop=True
-        )
+        # Select the first time step for simplicity for now, before regridding so
+        # only that step is interpolated
+        ds = ds.isel(time=0, drop=True)
+        #ds = ds.isel(depth=0, drop=True) # Select first depth level if multiple are present
 
         # Select only the relevant variables and rename if necessary for consistency
-        regridded_ds = regridded_ds[['water_u', 'water_v']].rename({'water_u': 'cur_u', 'water_v': 'cur_v'})
+        ds = ds[['water_u', 'water_v']].rename({'water_u': 'cur_u', 'water_v': 'cur_v'})
+        # Interpolate in float32; decoded inputs are often upcast to float64
+        ds = ds.astype(np.float32)
+
+        # Regrid the data to the target grid using cached bilinear weights
+        regridded_ds = regrid_bilinear(ds, 'lat', 'lon', grid_info)
 
         return regridded_ds
     except Exception as e:
         print(f"Error ingesting HYCOM data: {e}")
         return None
 
+# Placeholder regions as (min_lon, min_lat, max_lon, max_lat) boxes; grid points strictly
+# inside are masked. In production these would be Natural Earth/GSHHG or restricted-area polygons.
+POLAR_LATITUDE = 60
+LAND_BOXES = [
+    (-80, 20, -10, 50),  # North America
+    (-10, 35, 40, 70),  # Europe
+    (100, 10, 180, 60),  # Asia
+]
+RESTRICTED_BOXES = [
+    (-80, 25, -75, 30),  # Example restricted zone
+]
+
+# Bit index of each safety mask within the combined mask byte
+MASK_BITS = {"land": 0, "shallow": 1, "restricted": 2}
+
+# int16 encoding per field, decoded as value = stored * scale + offset
+QUANTIZATION = {
+    "wind_u": {"scale": 0.01, "offset": 0.0},  # +/-327 m/s
+    "wind_v": {"scale": 0.01, "offset": 0.0},
+    "wave_hs": {"scale": 0.002, "offset": 0.0},  # up to 65 m
+    "wave_tp": {"scale": 0.01, "offset": 0.0},  # up to 327 s
+    "wave_dir": {"scale": 0.01, "offset": 180.0},  # 0..360 degrees
+    "cur_u": {"scale": 0.001, "offset": 0.0},  # +/-32 m/s
+    "cur_v": {"scale": 0.001, "offset": 0.0},
+}
+INT16_NODATA = -32768
+# Directional fields are wrapped into [0, period) so they stay within the int16 range
+CIRCULAR_FIELDS = {"wave_dir": 360.0}
+
+def geometry_mask(geometries, grid_info):
+    """
+    uint8 mask of the grid points strictly inside any of the geometries,
+    with row 0 at the first (southernmost) latitude.
+    """
+    lats = grid_info['lats']
+    lons = grid_info['lons']
+    mask = np.zeros((len(lats), len(lons)), dtype=np.uint8)
+    
+    # Test each geometry on its own so points on an edge shared by two geometries
+    # stay outside, as they would if the geometries were unioned first
+    for geometry in geometries:
+        # Only grid points strictly inside the bounds can be inside the geometry
+        minx, miny, maxx, maxy = geometry.bounds
+        r0, r1 = np.searchsorted(lats, miny, side='right'), np.searchsorted(lats, maxy, side='left')
+        c0, c1 = np.searchsorted(lons, minx, side='right'), np.searchsorted(lons, maxx, side='left')
+        if r0 >= r1 or c0 >= c1:
+            continue
+        
+        # Prepared geometries build their spatial index once for the whole window
+        shapely.prepare(geometry)
+        mask[r0:r1, c0:c1] |= shapely.contains_xy(geometry, lons[np.newaxis, c0:c1], lats[r0:r1, np.newaxis])
+    
+    return mask
+
 def generate_land_mask(grid_info):
     """
     Generate a land mask based on a simple coastline approximation.
@@ -146,28 +261,19 @@ def generate_land_mask(grid_info):
     print("Generating land mask...")
     lats = grid_info['lats']
     lons = grid_info['lons']
-    
-    # Create coordinate grids
-    lon_grid, lat_grid = np.meshgrid(lons, lats)
+    d = grid_info['d']
     
     # Simple land mask: assume land is above certain latitude thresholds
     # This is a placeholder - in production, use actual coastline data
-    land_mask = np.zeros((len(lats), len(lons)), dtype=np.uint8)
+    west, east = lons[0] - d, lons[-1] + d
+    polar = [
+        (west, POLAR_LATITUDE, east, lats[-1] + d),
+        (west, lats[0] - d, east, -POLAR_LATITUDE),
+    ]
     
     # Basic land approximation (this is simplified for MVP)
     # In production, use Natural Earth or GSHHG coastline data
-    for i, lat in enumerate(lats):
-        for j, lon in enumerate(lons):
-            # Simple land detection based on latitude and longitude
-            # This is a placeholder - replace with actual coastline data
-            if lat > 60 or lat < -60:  # Polar regions
-                land_mask[i, j] = 1
-            elif 20 < lat < 50 and -80 < lon < -10:  # North America
-                land_mask[i, j] = 1
-            elif 35 < lat < 70 and -10 < lon < 40:  # Europe
-                land_mask[i, j] = 1
-            elif 10 < lat < 60 and 100 < lon < 180:  # Asia
-                land_mask[i, j] = 1
+    land_mask = geometry_mask([box(*b) for b in polar + LAND_BOXES], grid_info)
     
     return land_mask
 
@@ -181,28 +287,19 @@ def generate_shallow_mask(grid_info, depth_threshold=20.0):
     lats = grid_info['lats']
     lons = grid_info['lons']
     
-    # Create coordinate grids
-    lon_grid, lat_grid = np.meshgrid(lons, lats)
-    
     # Simple depth model (placeholder for MVP)
     # In production, use GEBCO or other bathymetry data
-    shallow_mask = np.zeros((len(lats), len(lons)), dtype=np.uint8)
+    # Tropical regions tend to be deeper, then subtropical, then higher latitudes
+    # The model only depends on latitude, so evaluate it once per row
+    abs_lat = np.abs(lats)
+    depth = np.where(abs_lat < 10, 50, np.where(abs_lat < 30, 30, 15))
     
     # Basic shallow water detection
     # This is simplified - replace with actual bathymetry data
-    for i, lat in enumerate(lats):
-        for j, lon in enumerate(lons):
-            # Simple depth approximation based on distance from coast
-            # This is a placeholder
-            if abs(lat) < 10:  # Tropical regions tend to be deeper
-                depth = 50
-            elif abs(lat) < 30:  # Subtropical
-                depth = 30
-            else:  # Higher latitudes
-                depth = 15
-            
-            if depth < depth_threshold:
-                shallow_mask[i, j] = 1
+    shallow_rows = (depth < depth_threshold).astype(np.uint8)
+    
+    # Copy the row values across all longitudes
+    shallow_mask = np.repeat(shallow_rows[:, None], len(lons), axis=1)
     
     return shallow_mask
 
@@ -212,23 +309,38 @@ def generate_restricted_mask(grid_info):
     military zones, etc. For MVP, this is mostly empty.
     """
     print("Generating restricted area mask...")
-    lats = grid_info['lats']
-    lons = grid_info['lons']
-    
-    # Create empty restricted mask for MVP
-    # In production, this would load actual restricted area polygons
-    restricted_mask = np.zeros((len(lats), len(lons)), dtype=np.uint8)
     
     # Placeholder: add some restricted areas for demonstration
     # In production, load from shapefiles or other vector data
-    for i, lat in enumerate(lats):
-        for j, lon in enumerate(lons):
-            # Example restricted areas (simplified)
-            if 25 < lat < 30 and -80 < lon < -75:  # Example restricted zone
-                restricted_mask[i, j] = 1
+    restricted_mask = geometry_mask([box(*b) for b in RESTRICTED_BOXES], grid_info)
     
     return restricted_mask
 
+def dilate3x3(mask):
+    """
+    One 8-connected 3x3 dilation, done separably as a 1x3 OR along columns
+    and then along rows. Cells outside the grid count as 0.
+    """
+    # Shifted slice ORs stop at the border, so nothing wraps and no shifted copies are made
+    horizontal = mask.copy()
+    horizontal[:, 1:] |= mask[:, :-1]
+    horizontal[:, :-1] |= mask[:, 1:]
+    
+    result = horizontal.copy()
+    result[1:, :] |= horizontal[:-1, :]
+    result[:-1, :] |= horizontal[1:, :]
+    return result
+
+def dilate_fft(mask, radius):
+    """
+    Dilate by a (2*radius+1) square box in one FFT convolution, which is
+    equivalent to `radius` repeated 3x3 dilations but O(N log N) in the
+    grid size instead of scaling with the radius.
+    """
+    kernel = np.ones((2 * radius + 1,) * mask.ndim, dtype=np.float32)
+    counts = fftconvolve(mask.astype(np.float32), kernel, mode='same')
+    return (counts > 0.5).astype(np.uint8)
+
 def apply_coastal_dilation(mask, iterations=1):
     """
     Apply 1-cell coastal dilation to expand land/shallow/restricted areas
@@ -236,17 +348,29 @@ def apply_coastal_dilation(mask, iterations=1):
     """
     print(f"Applying {iterations}-cell coastal dilation...")
     
-    # Define 8-connected structuring element for dilation
-    structure = np.ones((3, 3), dtype=np.uint8)
-    
-    # Apply binary dilation
-    dilated_mask = binary_dilation(mask, structure=structure, iterations=iterations)
-    
-    return dilated_mask.astype(np.uint8)
+    # Large margins are one box convolution; small ones stay on the cheap OR path.
+    # The convolution counts cells rather than ORing bits, so bitfield masks are
+    # dilated one bit-plane at a time.
+    if iterations > 3:
+        dilated_mask = np.zeros(mask.shape, dtype=np.uint8)
+        for bit in range(8):
+            plane = (mask >> bit) & 1
+            if plane.any():
+                dilated_mask |= dilate_fft(plane, iterations) << bit
+        return dilated_mask
+    
+    # Repeated 3x3 dilation with an 8-connected structuring element. The ORs act on
+    # every bit independently, so a bitfield mask dilates all its masks in one pass.
+    dilated_mask = mask.astype(np.uint8)
+    for _ in range(iterations):
+        dilated_mask = dilate3x3(dilated_mask)
+    
+    return dilated_mask
 
 def generate_all_masks(grid_info, depth_threshold=20.0):
     """
-    Generate all masks (land, shallow, restricted) and apply coastal dilation.
+    Generate all masks (land, shallow, restricted), pack them into a single
+    uint8 array using the bits in MASK_BITS and apply coastal dilation.
     """
     print("Generating all safety masks...")
     
@@ -255,51 +379,94 @@ def generate_all_masks(grid_info, depth_threshold=20.0):
     shallow_mask = generate_shallow_mask(grid_info, depth_threshold)
     restricted_mask = generate_restricted_mask(grid_info)
     
-    # Apply 1-cell coastal dilation to each mask
-    land_mask_dilated = apply_coastal_dilation(land_mask)
-    shallow_mask_dilated = apply_coastal_dilation(shallow_mask)
-    restricted_mask_dilated = apply_coastal_dilation(restricted_mask)
+    # One byte per cell: consumers test any mask with a single load and bit test
+    combined_mask = land_mask << MASK_BITS["land"]
+    combined_mask |= shallow_mask << MASK_BITS["shallow"]
+    combined_mask |= restricted_mask << MASK_BITS["restricted"]
     
-    return {
-        'land': land_mask_dilated,
-        'shallow': shallow_mask_dilated,
-        'restricted': restricted_mask_dilated
-    }
+    # Apply 1-cell coastal dilation to all masks at once on the packed bits
+    return apply_coastal_dilation(combined_mask)
+
+def quantize(data_array, scale, offset):
+    """
+    Quantize a float array to int16 as round((value - offset) / scale).
+    NaNs map to INT16_NODATA and other values are clipped to the remaining range.
+    """
+    scaled = np.clip(np.rint((data_array - offset) / scale), INT16_NODATA + 1, 32767)
+    scaled[np.isnan(scaled)] = INT16_NODATA
+    return scaled.astype(np.int16)
 
-def compress_data(data_array, compression_level=3):
+# Uncompressed bytes handed to the compressor per write
+COMPRESSION_CHUNK_BYTES = 1 << 20
+
+def new_part_hash():
+    """
+    Start a hash for pack part integrity, returned as (hash_alg, hasher).
+    BLAKE3 when installed, otherwise SHA256.
+    """
+    if blake3 is not None:
+        return "blake3", blake3.blake3()
+    return "sha256", hashlib.sha256()
+
+class HashWriter:
     """
-    Compress a numpy array using zstd compression.
+    File wrapper that hashes and counts the bytes written through it.
     """
-    # Convert to bytes
-    data_bytes = data_array.tobytes()
+    def __init__(self, f):
+        self.f = f
+        self.hash_alg, self.hash = new_part_hash()
+        self.bytes_written = 0
     
-    # Compress with zstd
-    compressed_data = zstd.compress(data_bytes, compression_level)
+    def write(self, data):
+        self.hash.update(data)
+        self.bytes_written += len(data)
+        return self.f.write(data)
     
-    return compressed_data
+    def flush(self):
+        self.f.flush()
 
-def calculate_sha256(data_bytes):
+def compress_to_file(data_array, filepath, compression_level=3, threads=-1):
     """
-    Calculate SHA256 hash of data bytes.
+    Stream a numpy array through zstd compression into a file.
+    Returns the compressed size, hash algorithm and hash of the written bytes.
+    threads=-1 uses one zstd worker per core, 0 compresses on the calling thread.
     """
-    return hashlib.sha256(data_bytes).hexdigest()
+    data = memoryview(np.ascontiguousarray(data_array)).cast('B')
+    
+    cctx = zstd.ZstdCompressor(level=compression_level, threads=threads)
+    with open(filepath, 'wb') as f:
+        hash_writer = HashWriter(f)
+        with cctx.stream_writer(hash_writer, size=data.nbytes, closefd=False) as writer:
+            for start in range(0, data.nbytes, COMPRESSION_CHUNK_BYTES):
+                writer.write(data[start:start + COMPRESSION_CHUNK_BYTES])
+    
+    return hash_writer.bytes_written, hash_writer.hash_alg, hash_writer.hash.hexdigest()
+
+# SigningKey objects by --signing_key argument, so repeated builds in one process
+# skip the decode and public key derivation
+_SIGNING_KEY_CACHE = {}
 
 def load_signing_key(signing_key_arg):
     """
     Load Ed25519 signing key from environment variable or file.
     """
+    if signing_key_arg in _SIGNING_KEY_CACHE:
+        return _SIGNING_KEY_CACHE[signing_key_arg]
+    
     if signing_key_arg.startswith('env:'):
         key_name = signing_key_arg[4:]  # Remove 'env:' prefix
         key_b64 = os.environ.get(key_name)
         if not key_b64:
             raise ValueError(f"Environment variable {key_name} not found")
         key_bytes = base64.b64decode(key_b64)
-        return SigningKey(key_bytes)
     else:
         # Assume it's a file path
         with open(signing_key_arg, 'rb') as f:
             key_bytes = f.read()
-        return SigningKey(key_bytes)
+    
+    signing_key = SigningKey(key_bytes)
+    _SIGNING_KEY_CACHE[signing_key_arg] = signing_key
+    return signing_key
 
 def create_manifest(region, cycle_iso, grid_info, output_data, parts_info, signing_key):
     """
@@ -324,15 +491,13 @@ def create_manifest(region, cycle_iso, grid_info, output_data, parts_info, signi
         "fields": list(output_data.keys()),
         "parts": parts_info,
         "masks": {
-            "land": "mask_land.bin.zst",
-            "shallow": "mask_shallow.bin.zst",
-            "restricted": "mask_restricted.bin.zst"
+            "combined": "mask_combined.bin.zst",
+            "bit_layout": MASK_BITS
         }
     }
     
-    # Create signature
-    manifest_json = json.dumps(manifest, sort_keys=True, separators=(',', ':'))
-    manifest_bytes = manifest_json.encode('utf-8')
+    # Create signature over the canonical form: sorted keys, compact separators, UTF-8
+    manifest_bytes = orjson.dumps(manifest, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
     signature = signing_key.sign(manifest_bytes)
     
     # Add signing info to manifest
@@ -344,10 +509,12 @@ def create_manifest(region, cycle_iso, grid_info, output_data, parts_info, signi
     
     return manifest
 
-def save_pack(output_data, manifest, output_dir):
+def save_pack(output_data, manifest, output_dir, encodings=None):
     """
     Save the pack data and manifest to the output directory.
+    encodings maps quantized field names to their scale/offset/nodata.
     """
+    encodings = encodings or {}
     print(f"Saving pack to {output_dir}")
     
     # Create output directory if it doesn't exist
@@ -355,30 +522,33 @@ def save_pack(output_data, manifest, output_dir):
     
     parts_info = []
     
-    # Save each data array as a compressed binary file
-    for field_name, data_array in output_data.items():
-        print(f"Compressing and saving {field_name}...")
-        
-        # Compress the data
-        compressed_data = compress_data(data_array)
-        
-        # Calculate SHA256 hash
-        sha256_hash = calculate_sha256(compressed_data)
-        
-        # Save compressed data
+    # Save each data array as a compressed binary file. Fields are independent and
+    # zstd/hashlib release the GIL, so threads compress them in parallel without
+    # copying the arrays; each compressor then runs single-threaded.
+    def compress_field(field_name):
+        filepath = os.path.join(output_dir, f"{field_name}.bin.zst")
+        return compress_to_file(output_data[field_name], filepath, threads=0)
+    
+    field_names = list(output_data.keys())
+    print(f"Compressing and saving {len(field_names)} fields...")
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        results = list(executor.map(compress_field, field_names))
+    
+    for field_name, (compressed_bytes, hash_alg, part_hash) in zip(field_names, results):
         filename = f"{field_name}.bin.zst"
-        filepath = os.path.join(output_dir, filename)
-        with open(filepath, 'wb') as f:
-            f.write(compressed_data)
         
-        # Add to parts info
-        parts_info.append({
+        # Add to parts info; hash_alg names the key holding the hash
+        part = {
             "idx": len(parts_info),
-            "bytes": len(compressed_data),
-            "sha256": sha256_hash
-        })
+            "bytes": compressed_bytes,
+            "hash_alg": hash_alg,
+            hash_alg: part_hash,
+            "dtype": str(output_data[field_name].dtype)
+        }
+        part.update(encodings.get(field_name, {}))
+        parts_info.append(part)
         
-        print(f"  Saved {filename}: {len(compressed_data)} bytes, SHA256: {sha256_hash[:16]}...")
+        print(f"  Saved {filename}: {compressed_bytes} bytes, {hash_alg.upper()}: {part_hash[:16]}...")
     
     # Update manifest with parts info
     manifest["parts"] = parts_info
@@ -409,10 +579,14 @@ def main():
 
     # Parse grid info
     lat0, lat1, lon0, lon1, d = map(float, args.grid.split('/'))
+    # Count points from the rounded extent; np.arange(lat0, lat1 + d, d) can gain or
+    # lose the endpoint through float accumulation
+    ny = int(round((lat1 - lat0) / d)) + 1
+    nx = int(round((lon1 - lon0) / d)) + 1
     grid_info = {
         "lat0": lat0, "lat1": lat1, "lon0": lon0, "lon1": lon1, "d": d,
-        "lats": np.arange(lat0, lat1 + d, d),
-        "lons": np.arange(lon0, lon1 + d, d)
+        "lats": np.linspace(lat0, lat1, ny),
+        "lons": np.linspace(lon0, lon1, nx)
     }
 
     print(f"Building pack for region: {args.region}, cycle: {args.cycle}")
@@ -442,7 +616,8 @@ def main():
 
     # Combine all datasets. xarray.combine_by_coords handles aligning on common dimensions (like time).
     # For this MVP, we are simplifying to a single time step, so this will effectively merge variables.
-    combined_ds = xr.merge(all_data)
+    # The inputs are lazy dask arrays; compute once here so shared reads run in a single pass.
+    combined_ds = xr.merge(all_data).compute()
 
     # Ensure the data is in (T, Y, X) C-order and float32
     # Assuming 'time', 'latitude', 'longitude' as dimensions
@@ -455,22 +630,35 @@ def main():
             # Ensure (T, Y, X) order for time-dependent variables
             # Adjust based on actual dimension names in your xarray dataset
             dims = [dim for dim in ['time', 'latitude', 'longitude'] if dim in combined_ds[var_name].dims]
-            data_array = combined_ds[var_name].transpose(*dims).values.astype(np.float32)
+            data_array = combined_ds[var_name].transpose(*dims).values
         else:
             # For time-independent variables (e.g., masks later), just to_numpy
-            data_array = combined_ds[var_name].values.astype(np.float32)
+            data_array = combined_ds[var_name].values
+        # Copies only if the values are not already C-contiguous float32, so the
+        # compressor can read the array's memory directly
+        data_array = np.ascontiguousarray(data_array, dtype=np.float32)
         output_data[var_name] = data_array
         print(f"Prepared {var_name}: Shape {data_array.shape}, Dtype {data_array.dtype}")
 
+    # Quantize fields with a known encoding to int16
+    encodings = {}
+    for var_name, encoding in QUANTIZATION.items():
+        if var_name in output_data:
+            data_array = output_data[var_name]
+            if var_name in CIRCULAR_FIELDS:
+                data_array = np.mod(data_array, CIRCULAR_FIELDS[var_name])
+            output_data[var_name] = quantize(data_array, encoding["scale"], encoding["offset"])
+            encodings[var_name] = dict(encoding, nodata=INT16_NODATA)
+            print(f"Quantized {var_name} to int16 (scale {encoding['scale']}, offset {encoding['offset']})")
+
     # Generate safety masks
-    masks = generate_all_masks(grid_info, args.depth_threshold)
+    combined_mask = generate_all_masks(grid_info, args.depth_threshold)
     
-    # Add masks to output data
-    for mask_name, mask_data in masks.items():
-        output_data[f'mask_{mask_name}'] = mask_data
-        print(f"Prepared mask_{mask_name}: Shape {mask_data.shape}, Dtype {mask_data.dtype}")
+    # Add the combined mask to output data
+    output_data['mask_combined'] = combined_mask
+    print(f"Prepared mask_combined: Shape {combined_mask.shape}, Dtype {combined_mask.dtype}")
 
-    print("Data ingestion, regridding, mask generation, and preparation to float32 C-order arrays complete.")
+    print("Data ingestion, regridding, quantization, mask generation, and preparation to C-order arrays complete.")
     
     # Load signing key
     try:
@@ -482,7 +670,7 @@ def main():
     
     # Create and save the pack
     manifest = create_manifest(args.region, args.cycle, grid_info, output_data, [], signing_key)
-    save_pack(output_data, manifest, args.out)
+    save_pack(output_data, manifest, args.out, encodings)
     
     print(f"Pack creation complete! Output saved to: {args.out}")
 
@@ -9,6 +9,46 @@ import xarray as xr
 import os
 from datetime import datetime, timedelta
 
+# One seeded PCG64 generator so every run produces the same synthetic fields
+_rng = np.random.default_rng(0)
+
+def _normal(shape, mean, std):
+    """Draw normal samples into a fresh buffer, scaling in place."""
+    buf = np.empty(shape, dtype=np.float32)
+    _rng.standard_normal(dtype=np.float32, out=buf)
+    buf *= std
+    buf += mean
+    return buf
+
+def _exponential(shape, scale):
+    """Draw exponential samples into a fresh buffer, scaling in place."""
+    buf = np.empty(shape, dtype=np.float32)
+    _rng.standard_exponential(dtype=np.float32, out=buf)
+    buf *= scale
+    return buf
+
+def _uniform(shape, low, high):
+    """Draw uniform samples into a fresh buffer, scaling in place."""
+    buf = np.empty(shape, dtype=np.float32)
+    _rng.random(dtype=np.float32, out=buf)
+    buf *= high - low
+    buf += low
+    return buf
+
+def _write_nc(ds, output_path):
+    """Write a dataset as float32 NetCDF4 with one compressed chunk per time step."""
+    encoding = {
+        var: {
+            'dtype': 'float32',
+            'zlib': True,
+            'complevel': 1,
+            'shuffle': True,
+            'chunksizes': (1,) + ds[var].shape[1:]
+        }
+        for var in ds.data_vars
+    }
+    ds.to_netcdf(output_path, format='NETCDF4', engine='netcdf4', encoding=encoding)
+
 def create_test_gfs_data(output_path, cycle_time):
     """Create synthetic GFS wind data."""
     print(f"Creating test GFS data: {output_path}")
@@ -19,8 +59,9 @@ def create_test_gfs_data(output_path, cycle_time):
     times = [cycle_time]
     
     # Create synthetic wind data
-    u_wind = np.random.normal(5, 3, (len(times), len(lats), len(lons)))  # m/s
-    v_wind = np.random.normal(2, 2, (len(times), len(lats), len(lons)))  # m/s
+    shape = (len(times), len(lats), len(lons))
+    u_wind = _normal(shape, 5, 3)  # m/s
+    v_wind = _normal(shape, 2, 2)  # m/s
     
     # Create xarray dataset
     ds = xr.Dataset({
@@ -37,7 +78,7 @@ def create_test_gfs_data(output_path, cycle_time):
     ds['v'].attrs = {'long_name': 'v-component of wind', 'units': 'm s**-1'}
     
     # Save as NetCDF (simpler than GRIB for testing)
-    ds.to_netcdf(output_path)
+    _write_nc(ds, output_path)
     print(f"  Saved GFS test data: {len(lats)}x{len(lons)} grid, {len(times)} time steps")
 
 def create_test_ww3_data(output_path, cycle_time):
@@ -50,9 +91,10 @@ def create_test_ww3_data(output_path, cycle_time):
     times = [cycle_time]
     
     # Create synthetic wave data
-    hs = np.random.exponential(2, (len(times), len(lats), len(lons)))  # Significant wave height (m)
-    tp = np.random.normal(8, 2, (len(times), len(lats), len(lons)))  # Peak period (s)
-    dir = np.random.uniform(0, 360, (len(times), len(lats), len(lons)))  # Direction (deg)
+    shape = (len(times), len(lats), len(lons))
+    hs = _exponential(shape, 2)  # Significant wave height (m)
+    tp = _normal(shape, 8, 2)  # Peak period (s)
+    dir = _uniform(shape, 0, 360)  # Direction (deg)
     
     # Create xarray dataset
     ds = xr.Dataset({
@@ -71,7 +113,7 @@ def create_test_ww3_data(output_path, cycle_time):
     ds['dir'].attrs = {'long_name': 'Wave direction', 'units': 'degree'}
     
     # Save as NetCDF
-    ds.to_netcdf(output_path)
+    _write_nc(ds, output_path)
     print(f"  Saved WW3 test data: {len(lats)}x{len(lons)} grid, {len(times)} time steps")
 
 def create_test_hycom_data(output_path, cycle_time):
@@ -84,8 +126,9 @@ def create_test_hycom_data(output_path, cycle_time):
     times = [cycle_time]
     
     # Create synthetic current data
-    u_current = np.random.normal(0.1, 0.05, (len(times), len(lats), len(lons)))  # m/s
-    v_current = np.random.normal(0.05, 0.03, (len(times), len(lats), len(lons)))  # m/s
+    shape = (len(times), len(lats), len(lons))
+    u_current = _normal(shape, 0.1, 0.05)  # m/s
+    v_current = _normal(shape, 0.05, 0.03)  # m/s
     
     # Create xarray dataset
     ds = xr.Dataset({
@@ -102,7 +145,7 @@ def create_test_hycom_data(output_path, cycle_time):
     ds['water_v'].attrs = {'long_name': 'v-component of current', 'units': 'm s**-1'}
     
     # Save as NetCDF
-    ds.to_netcdf(output_path)
+    _write_nc(ds, output_path)
     print(f"  Saved HYCOM test data: {len(lats)}x{len(lons)} grid, {len(times)} time steps")
 
 def main():
@@ -9,7 +9,7 @@ from nacl.signing import SigningKey
 from nacl.encoding import Base64Encoder
 
 def generate_test_key():
-    """Generate a test Ed25519 signing key and output it as base64."""
+    """Generate a test Ed25519 signing key, print it and return it as base64."""
     # Generate a new random signing key
     signing_key = SigningKey.generate()
     
@@ -28,5 +28,7 @@ def generate_test_key():
     print("WARNING: This is a test key for development only!")
     print("Do NOT use this key in production!")
 
+    return key_b64
+
 if __name__ == "__main__":
     generate_test_key()
@@ -8,6 +8,9 @@ import sys
 import subprocess
 from datetime import datetime
 
+import generate_test_data
+import generate_test_key
+
 def run_command(cmd, description):
     """Run a command and handle errors."""
     print(f"\n{'='*60}")
@@ -15,23 +18,28 @@ def run_command(cmd, description):
     print(f"Command: {cmd}")
     print('='*60)
     
+    # Stream output as it arrives instead of buffering it until the command exits;
+    # unbuffered child interpreters make Python progress prints show up live
+    env = dict(os.environ, PYTHONUNBUFFERED='1')
     try:
-        result = subprocess.run(cmd, shell=True, check=True, capture_output=True, text=True)
-        print("✅ SUCCESS")
-        if result.stdout:
-            print("STDOUT:")
-            print(result.stdout)
-        return True
-    except subprocess.CalledProcessError as e:
+        proc = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, bufsize=1, env=env)
+    except OSError as e:
+        print("❌ FAILED")
+        print(f"Could not start command: {e}")
+        return False
+    
+    with proc:
+        for line in proc.stdout:
+            print(line, end='')
+    
+    if proc.returncode != 0:
         print("❌ FAILED")
-        print(f"Return code: {e.returncode}")
-        if e.stdout:
-            print("STDOUT:")
-            print(e.stdout)
-        if e.stderr:
-            print("STDERR:")
-            print(e.stderr)
+        print(f"Return code: {proc.returncode}")
         return False
+    
+    print("✅ SUCCESS")
+    return True
 
 def main():
     """Main test function."""
@@ -44,46 +52,24 @@ def main():
     
     # Step 1: Generate test data
     print("\nStep 1: Generating synthetic test data...")
-    if not run_command("python3 generate_test_data.py", "Generate test data"):
-        print("❌ Failed to generate test data")
+    try:
+        generate_test_data.main()
+    except Exception as e:
+        print(f"❌ Failed to generate test data: {e}")
         return 1
     
-    # Step 2: Generate test signing key
+    # Step 2: Generate test signing key once and export it for the build
     print("\nStep 2: Generating test signing key...")
-    if not run_command("python3 generate_test_key.py", "Generate test key"):
-        print("❌ Failed to generate test key")
-        return 1
-    
-    # Step 3: Set up environment with test key
-    print("\nStep 3: Setting up environment...")
-    # Get the test key from the output
     try:
-        result = subprocess.run("python3 generate_test_key.py", shell=True, capture_output=True, text=True)
-        if result.returncode != 0:
-            print("❌ Failed to get test key")
-            return 1
-        
-        # Extract the key from output
-        key_line = None
-        for line in result.stdout.split('\n'):
-            if line.startswith('ED25519_PRIV='):
-                key_line = line
-                break
-        
-        if not key_line:
-            print("❌ Could not extract test key")
-            return 1
-        
-        # Set environment variable
-        os.environ['ED25519_PRIV'] = key_line.split('=', 1)[1]
-        print("✅ Test key set in environment")
-        
+        key_b64 = generate_test_key.generate_test_key()
     except Exception as e:
-        print(f"❌ Failed to set up environment: {e}")
+        print(f"❌ Failed to generate test key: {e}")
         return 1
+    os.environ['ED25519_PRIV'] = key_b64
+    print("✅ Test key set in environment")
     
-    # Step 4: Build the pack
-    print("\nStep 4: Building sample NATL_050 pack...")
+    # Step 3: Build the pack
+    print("\nStep 3: Building sample NATL_050 pack...")
     
     # Get current time for cycle
     cycle_time = datetime.now().replace(minute=0, second=0, microsecond=0)
@@ -104,20 +90,20 @@ def main():
         print("❌ Failed to build pack")
         return 1
     
-    # Step 5: Verify the pack
-    print("\nStep 5: Verifying the built pack...")
+    # Step 4: Verify the pack
+    print("\nStep 4: Verifying the built pack...")
     if not run_command("python3 verify_pack.py ./out/NATL_050_test", "Verify pack"):
         print("❌ Pack verification failed")
         return 1
     
-    # Step 6: Show pack contents
-    print("\nStep 6: Pack contents...")
+    # Step 5: Show pack contents
+    print("\nStep 5: Pack contents...")
     if not run_command("ls -la ./out/NATL_050_test/", "List pack contents"):
         print("❌ Failed to list pack contents")
         return 1
     
     # Show manifest
-    print("\nStep 7: Pack manifest...")
+    print("\nStep 6: Pack manifest...")
     if not run_command("cat ./out/NATL_050_test/manifest.json", "Show manifest"):
         print("❌ Failed to show manifest")
         return 1
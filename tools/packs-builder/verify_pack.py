@@ -4,6 +4,7 @@ Verify a SeaSight data pack by checking manifest, signatures, and data integrity
 """
 
 import json
+import orjson
 import os
 import zstandard as zstd
 import hashlib
@@ -12,6 +13,58 @@ import numpy as np
 from nacl.signing import VerifyKey
 from nacl.encoding import Base64Encoder
 
+try:
+    import blake3  # Optional: needed only for packs hashed with BLAKE3
+except ImportError:
+    blake3 = None
+
+# Part hash constructors by the manifest's hash_alg name
+HASHERS = {'sha256': hashlib.sha256}
+if blake3 is not None:
+    HASHERS['blake3'] = blake3.blake3
+
+def hash_file(filepath, hash_alg='sha256', chunk_size=1 << 20):
+    """Hex digest of a file, read in fixed-size chunks into one reused buffer."""
+    file_hash = HASHERS[hash_alg]()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(filepath, 'rb') as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            file_hash.update(view[:n])
+    return file_hash.hexdigest()
+
+# Largest possible zstd frame header (ZSTD_FRAMEHEADERSIZE_MAX)
+ZSTD_FRAME_HEADER_MAX = 18
+
+def read_part(filepath, dtype):
+    """
+    Decompress a part file into a numpy array of the given dtype. When the frame
+    header records the decompressed size, the output is allocated once and the
+    stream is decompressed straight into it.
+    """
+    with open(filepath, 'rb') as f:
+        header = f.read(ZSTD_FRAME_HEADER_MAX)
+        content_size = zstd.get_frame_parameters(header).content_size
+        f.seek(0)
+        
+        with zstd.ZstdDecompressor().stream_reader(f) as reader:
+            if content_size in (zstd.CONTENTSIZE_UNKNOWN, zstd.CONTENTSIZE_ERROR):
+                return np.frombuffer(reader.readall(), dtype=dtype)
+            
+            out = np.empty(content_size, dtype=np.uint8)
+            view = memoryview(out)
+            filled = 0
+            while filled < content_size:
+                n = reader.readinto(view[filled:])
+                if not n:
+                    raise ValueError(f"Truncated frame: {filled} of {content_size} bytes")
+                filled += n
+    
+    return out.view(dtype)
+
 def load_manifest(pack_dir):
     """Load and parse the pack manifest."""
     manifest_path = os.path.join(pack_dir, "manifest.json")
@@ -54,8 +107,7 @@ def verify_signature(manifest, public_key_b64=None):
     # Create manifest without signature for verification
     manifest_copy = manifest.copy()
     del manifest_copy['signing']
-    manifest_json = json.dumps(manifest_copy, sort_keys=True, separators=(',', ':'))
-    manifest_bytes = manifest_json.encode('utf-8')
+    manifest_bytes = orjson.dumps(manifest_copy, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
     
     try:
         # Decode signature
@@ -91,7 +143,8 @@ def verify_parts(manifest, pack_dir):
     for i, part in enumerate(parts):
         idx = part.get('idx', i)
         expected_bytes = part.get('bytes', 0)
-        expected_sha256 = part.get('sha256', '')
+        hash_alg = part.get('hash_alg', 'sha256')
+        expected_hash = part.get(hash_alg, '')
         
         # Find the corresponding file
         field_name = manifest['fields'][idx]
@@ -110,19 +163,22 @@ def verify_parts(manifest, pack_dir):
             all_valid = False
             continue
         
-        # Check SHA256 hash
-        with open(filepath, 'rb') as f:
-            file_data = f.read()
-        actual_sha256 = hashlib.sha256(file_data).hexdigest()
+        # Check hash
+        if hash_alg not in HASHERS:
+            print(f"❌ Part {idx} ({filename}): Unsupported hash algorithm {hash_alg}")
+            all_valid = False
+            continue
         
-        if actual_sha256 != expected_sha256:
-            print(f"❌ Part {idx} ({filename}): SHA256 mismatch")
-            print(f"  Expected: {expected_sha256}")
-            print(f"  Actual:   {actual_sha256}")
+        actual_hash = hash_file(filepath, hash_alg)
+        
+        if actual_hash != expected_hash:
+            print(f"❌ Part {idx} ({filename}): {hash_alg.upper()} mismatch")
+            print(f"  Expected: {expected_hash}")
+            print(f"  Actual:   {actual_hash}")
             all_valid = False
             continue
         
-        print(f"✅ Part {idx} ({filename}): {actual_bytes} bytes, SHA256 verified")
+        print(f"✅ Part {idx} ({filename}): {actual_bytes} bytes, {hash_alg.upper()} verified")
     
     return all_valid
 
@@ -133,7 +189,16 @@ def verify_masks(manifest, pack_dir):
     masks = manifest.get('masks', {})
     all_valid = True
     
-    for mask_name, filename in masks.items():
+    if 'combined' in masks:
+        # Bitfield layout: one file, each mask stored in its own bit
+        bit_layout = masks.get('bit_layout', {})
+        mask_files = {'combined': masks['combined']}
+        max_allowed = (1 << (max(bit_layout.values()) + 1)) - 1 if bit_layout else 1
+    else:
+        mask_files = masks
+        max_allowed = 1
+    
+    for mask_name, filename in mask_files.items():
         filepath = os.path.join(pack_dir, filename)
         
         if not os.path.exists(filepath):
@@ -143,23 +208,22 @@ def verify_masks(manifest, pack_dir):
         
         # Try to decompress and check basic properties
         try:
-            with open(filepath, 'rb') as f:
-                compressed_data = f.read()
+            # Decompress into a numpy array (assuming uint8 for masks)
+            mask_array = read_part(filepath, np.uint8)
             
-            # Decompress
-            decompressed_data = zstd.decompress(compressed_data)
-            
-            # Convert back to numpy array (assuming uint8 for masks)
-            mask_array = np.frombuffer(decompressed_data, dtype=np.uint8)
-            
-            # Basic validation
-            unique_values = np.unique(mask_array)
-            if not all(v in [0, 1] for v in unique_values):
-                print(f"❌ Mask {mask_name}: Invalid values (should be 0 or 1)")
+            # Basic validation: a single max reduction instead of sorting with np.unique
+            max_value = int(mask_array.max()) if mask_array.size else 0
+            if max_value > max_allowed:
+                print(f"❌ Mask {mask_name}: Invalid values (max={max_value}, should be 0 to {max_allowed})")
                 all_valid = False
                 continue
             
-            print(f"✅ Mask {mask_name} ({filename}): {len(mask_array)} cells, values {unique_values}")
+            print(f"✅ Mask {mask_name} ({filename}): {len(mask_array)} cells, max value {max_value}")
+            
+            if mask_name == 'combined':
+                for bit_name, bit in bit_layout.items():
+                    count = np.count_nonzero(mask_array & (1 << bit))
+                    print(f"  {bit_name} (bit {bit}): {count} cells set")
             
         except Exception as e:
             print(f"❌ Mask {mask_name} ({filename}): Decompression failed - {e}")
@@ -184,19 +248,20 @@ def verify_data_integrity(manifest, pack_dir):
             continue
         
         try:
-            # Load and decompress
-            with open(filepath, 'rb') as f:
-                compressed_data = f.read()
-            
-            decompressed_data = zstd.decompress(compressed_data)
+            # Load and decompress (float32 unless the part records another dtype)
+            data_array = read_part(filepath, part.get('dtype', 'float32'))
             
-            # Convert to numpy array (assuming float32 for data)
-            data_array = np.frombuffer(decompressed_data, dtype=np.float32)
+            # Dequantize int16 parts back to physical values
+            if 'scale' in part:
+                values = data_array * part['scale'] + part.get('offset', 0.0)
+                if 'nodata' in part:
+                    values[data_array == part['nodata']] = np.nan
+                data_array = values
             
             # Basic statistics
-            min_val = np.min(data_array)
-            max_val = np.max(data_array)
-            mean_val = np.mean(data_array)
+            min_val = np.nanmin(data_array)
+            max_val = np.nanmax(data_array)
+            mean_val = np.nanmean(data_array)
             
             print(f"✅ {field_name}: {len(data_array)} values, range [{min_val:.3f}, {max_val:.3f}], mean {mean_val:.3f}")
             